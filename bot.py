@@ -23,18 +23,27 @@ import json
 import sqlite3
 import logging
 import asyncio
+import operator
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional, Dict, List
 
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import RetryAfter
 from telegram.ext import (
     ApplicationBuilder, 
     CommandHandler, 
     CallbackQueryHandler,
     ContextTypes
 )
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
-from tradingview_ta import TA_Handler, Interval
+from tradingview_ta import TradingView, Interval, __version__ as TV_TA_VERSION
+from tradingview_ta.main import calculate
 
 # ═══════════════════════════════════════════════════════════════
 # LOGGING SETUP
@@ -61,7 +70,7 @@ EXCHANGE_API_SECRET = os.getenv("EXCHANGE_API_SECRET", "")
 # ═══════════════════════════════════════════════════════════════
 
 # Coins - Extended.exchange desteklenen tüm coinler
-COINS = [
+COINS = (
     # Major
     "BTC", "ETH", "SOL", "XRP", "BNB", "LTC", "BCH", "DOT", "LINK", "SUI",
     # L1/L2  
@@ -73,7 +82,7 @@ COINS = [
     # Others
     "HYPE", "TON", "TAO", "SEI", "CAKE", "CFX", "CRO", "ONDO", "ENS", "ENA",
     "HBAR", "PYTH", "RAY", "ORDI", "WLD", "ALGO", "OKB", "MNT", "ZK", "GRASS"
-]
+)
 
 # Coin kategorileri (korelasyon kontrolü için)
 COIN_CATEGORIES = {
@@ -84,12 +93,20 @@ COIN_CATEGORIES = {
     "ai": ["TAO", "WLD", "GRASS"],
 }
 
+# Coin → kategori (O(1) lookup)
+COIN_CATEGORY = {
+    coin: category
+    for category, coins in COIN_CATEGORIES.items()
+    for coin in coins
+}
+
 # Scanning
 SCAN_INTERVAL = 60              # Saniye
 MAX_SIGNALS_PER_SCAN = 3        # Scan başına max sinyal
 MAX_SIGNALS_DAY = 15            # Günlük max sinyal
 MIN_SCORE = 75                  # Minimum sinyal skoru
 DUPLICATE_COOLDOWN = 300        # Aynı coin için bekleme (saniye)
+SCAN_WORKERS = 8                # Paralel coin analizi (thread)
 
 # Scalp Levels - ATR based
 ATR_SL = 0.6
@@ -103,12 +120,32 @@ PCT_TP1 = 0.6
 PCT_TP2 = 1.2
 PCT_TP3 = 2.0
 
+# (SL, TP1, TP2, TP3) çarpanları - yüzdeler burada bir kez kesre çevrilir
+ATR_LEVELS = (ATR_SL, ATR_TP1, ATR_TP2, ATR_TP3)
+PCT_LEVELS = tuple(p / 100 for p in (PCT_SL, PCT_TP1, PCT_TP2, PCT_TP3))
+
 # Leverage
 MAX_LEVERAGE_HIGH = 20          # Score >= 85
 MAX_LEVERAGE_NORMAL = 15        # Score < 85
 
+# TradingView recommendation → int kod (string karşılaştırması yerine)
+REC_CODES = {"STRONG_BUY": 2, "BUY": 1, "NEUTRAL": 0, "SELL": -1, "STRONG_SELL": -2}
+
+# BTC trend yönü (int) → gösterim adı
+TREND_NAMES = {1: "BULLISH", -1: "BEARISH", 0: "NEUTRAL"}
+
+# 5m indicator anahtarları (tek itemgetter çağrısıyla okunur)
+# Not: TradingView'un standart kolon listesinde EMA9/EMA21 yok, EMA10/EMA20 kullanılır
+# tv_parse listedeki her anahtarı yazar (boş değer None kalır); ATR listede
+# olmadığı için ayrıca .get ile okunur
+get_indicator_values = operator.itemgetter(
+    'close', 'high', 'low', 'open',
+    'RSI', 'MACD.macd', 'MACD.signal', 'Stoch.K', 'Stoch.D',
+    'EMA10', 'EMA20', 'Mom', 'AO', 'ADX',
+)
+
 # Dangerous hours (UTC) - Only funding hours (less restrictive)
-DANGEROUS_HOURS = [0, 8]  # Sadece funding saatleri - daha fazla sinyal için
+DANGEROUS_HOURS = frozenset({0, 8})  # Sadece funding saatleri - daha fazla sinyal için
 
 # Scoring weights
 WEIGHTS = {
@@ -122,18 +159,102 @@ WEIGHTS = {
     "adx_bonus": 5,
     "btc_alignment": 5,
 }
+# Adım 6'dan sonra eklenebilecek max puan (15m + ADX + BTC)
+LATE_BONUS_MAX = WEIGHTS["tf_15m_bonus"] + WEIGHTS["adx_bonus"] + WEIGHTS["btc_alignment"]
 
 # Database
 DATABASE_PATH = "signals.db"
+HISTORY_MAX = 50                # /history için max satır (Telegram 4096 karakter)
+
+# TradingView exchange fallback sırası
+TV_EXCHANGES = ("BINANCE", "BYBIT", "OKX", "KUCOIN")
+
+# TradingView scanner endpoint
+TV_SCAN_URL = "https://scanner.tradingview.com/crypto/scan"
+TV_TIMEOUT = 10                 # Saniye
+
+# Scanner isteğinin beklenen hataları: ağ/HTTP ve bozuk JSON (sadece tv_post)
+TV_ERRORS = (requests.RequestException, ValueError)
+
+# TradingView analiz cache süresi (saniye) - değerler açık bar ile değiştiği
+# için kısa tutulur; aynı scan içindeki ve art arda gelen /scan istekleri paylaşır
+TV_CACHE_TTL = {
+    Interval.INTERVAL_1_MINUTE: 20,
+    Interval.INTERVAL_5_MINUTES: 45,
+    Interval.INTERVAL_15_MINUTES: 90,
+    Interval.INTERVAL_1_HOUR: 300,  # BTC trend oyu - her scan'de yeniden çekmeye gerek yok
+}
+
+# TradingView istek limiti
+TV_RATE = 6                     # İstek/saniye
+
+# Telegram gönderim limiti (Bot API ~30 mesaj/saniye)
+TELEGRAM_RATE = 30              # Mesaj/saniye
 
 # ═══════════════════════════════════════════════════════════════
 # GLOBAL STATE
 # ═══════════════════════════════════════════════════════════════
 BTC_RSI = 50
-BTC_TREND = "NEUTRAL"  # BULLISH, BEARISH, NEUTRAL
+BTC_TREND = "NEUTRAL"  # BULLISH, BEARISH, NEUTRAL (mesaj/DB için)
+BTC_BIAS = 0  # 1 / -1 / 0 - analizde string yerine bu karşılaştırılır
 RECENT_SIGNALS = {}
 SIGNALS_TODAY = 0
 ACTIVE_CATEGORY_COUNT = {}  # Korelasyon kontrolü için
+# tf → OrderedDict(symbol → (fetched_at, Analysis | None)); timeframe başına
+# TTL sabit olduğundan yazım sırası = süre dolma sırası, eskiler baştan atılır
+TV_CACHE = {tf: OrderedDict() for tf in TV_CACHE_TTL}
+TV_EXCHANGE_OF = {}  # symbol → verisi bulunan exchange (fallback turlarını atlamak için)
+
+# tradingview_ta.calculate() sınıf seviyesindeki Analysis.indicators
+# dict'ine yazıyor - paralel taramada thread'ler arası karışmasın
+TV_CALC_LOCK = threading.Lock()
+
+# Manuel /scan ile arka plan taraması üst üste binmesin - bekleyen scan
+# öncekinin doldurduğu TV_CACHE'den okur
+SCAN_LOCK = threading.Lock()
+
+# Coin analizi için kalıcı thread havuzu - her scan'de thread açıp kapatmak yerine
+SCAN_POOL = ThreadPoolExecutor(max_workers=SCAN_WORKERS, thread_name_prefix="scan")
+
+# ═══════════════════════════════════════════════════════════════
+# RATE LIMITING
+# ═══════════════════════════════════════════════════════════════
+
+class RateLimiter:
+    """Token-bucket hız sınırlayıcı - boşluk varsa bekletmeden geçirir"""
+    
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def _reserve(self) -> float:
+        """Bir token ayır, beklenmesi gereken süreyi döndür"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+    
+    def acquire(self):
+        """Thread'ler için token bekle (bloklayıcı)"""
+        delay = self._reserve()
+        if delay:
+            time.sleep(delay)
+    
+    async def wait(self):
+        """Async görevler için token bekle"""
+        delay = self._reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+TV_LIMITER = RateLimiter(TV_RATE, TV_RATE)
+TELEGRAM_LIMITER = RateLimiter(TELEGRAM_RATE, TELEGRAM_RATE)
 
 # ═══════════════════════════════════════════════════════════════
 # DATABASE FUNCTIONS
@@ -172,6 +293,12 @@ def init_database():
         )
     """)
     
+    # Stats/history sorguları created_at üzerinden aralık taraması yapar
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_signals_created_at
+        ON signals (created_at)
+    """)
+    
     conn.commit()
     conn.close()
     logger.info(f"✅ Database initialized: {DATABASE_PATH}")
@@ -244,7 +371,7 @@ def get_performance_stats(days: int = 7) -> Dict:
             MAX(pnl_pct) as best_trade,
             MIN(pnl_pct) as worst_trade
         FROM signals
-        WHERE DATE(created_at) >= ?
+        WHERE created_at >= ?
     """, (since,))
     
     row = cursor.fetchone()
@@ -289,8 +416,12 @@ def get_today_signals_count() -> int:
     conn = sqlite3.connect(DATABASE_PATH)
     cursor = conn.cursor()
     
-    today = datetime.utcnow().strftime('%Y-%m-%d')
-    cursor.execute("SELECT COUNT(*) FROM signals WHERE DATE(created_at) = ?", (today,))
+    today = datetime.utcnow().date()
+    tomorrow = today + timedelta(days=1)
+    cursor.execute(
+        "SELECT COUNT(*) FROM signals WHERE created_at >= ? AND created_at < ?",
+        (today.isoformat(), tomorrow.isoformat())
+    )
     
     count = cursor.fetchone()[0]
     conn.close()
@@ -300,26 +431,186 @@ def get_today_signals_count() -> int:
 # TRADINGVIEW DATA FUNCTIONS
 # ═══════════════════════════════════════════════════════════════
 
+# Tüm TradingView istekleri tek session üzerinden (keep-alive, TCP/TLS tekrar kullanılır)
+HTTP_SESSION = requests.Session()
+HTTP_SESSION.headers["User-Agent"] = f"tradingview_ta/{TV_TA_VERSION}"
+# Her scan worker'ı için bir açık bağlantı; scanner POST'u salt okuma
+# olduğu için geçici hatalarda (bağlantı, 429/5xx) tekrar denenir
+HTTP_SESSION.mount("https://", HTTPAdapter(
+    pool_maxsize=SCAN_WORKERS,
+    max_retries=Retry(
+        total=2,
+        backoff_factor=0.3,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"POST"})
+    )
+))
+
+def tv_post(tickers: List[str], *tfs: str) -> List[Dict]:
+    """TradingView scanner'a tek POST - ham satırlar [{'s': ticker, 'd': [...]}]
+    
+    Birden fazla timeframe aynı istekte çekilir: kolonlar "|5", "|60" gibi
+    interval ekleriyle yan yana gelir. Hata olarak sadece TV_ERRORS fırlatır.
+    """
+    columns = []
+    for tf in tfs:
+        columns += TradingView.data(tickers, tf, TradingView.indicators)['columns']
+    payload = TradingView.data(tickers, tfs[0], ())
+    payload['columns'] = columns
+    
+    TV_LIMITER.acquire()
+    response = HTTP_SESSION.post(TV_SCAN_URL, json=payload, timeout=TV_TIMEOUT)
+    response.raise_for_status()
+    return json.loads(response.content).get('data') or []
+
+def tv_parse(rows: List[Dict], *tfs: str) -> Dict:
+    """tv_post satırlarını timeframe başına dilimle - {ticker: {tf: Analysis | None}}"""
+    n = len(TradingView.indicators)
+    results = {}
+    for row in rows:
+        exchange, symbol = row['s'].split(':')
+        by_tf = results[row['s']] = {}
+        for i, tf in enumerate(tfs):
+            indicators = dict(zip(TradingView.indicators, row['d'][i * n:(i + 1) * n]))
+            with TV_CALC_LOCK:
+                by_tf[tf] = calculate(
+                    indicators=indicators,
+                    indicators_key=TradingView.indicators,
+                    screener="crypto",
+                    symbol=symbol,
+                    exchange=exchange,
+                    interval=tf
+                )
+    return results
+
+def _tv_cache_get(symbol: str, tf: str):
+    """Taze cache kaydı varsa (fetched_at, Analysis | None) döndür"""
+    cached = TV_CACHE.get(tf, {}).get(symbol)
+    if cached is not None and time.time() - cached[0] < TV_CACHE_TTL[tf]:
+        return cached
+    return None
+
+def _tv_cache_put(symbol: str, tf: str, analysis, fetched_at: float):
+    """Cache'e yaz - yenilenen kayıt sona taşınır"""
+    cache = TV_CACHE.get(tf)
+    if cache is None:
+        return  # TTL tanımsız timeframe cache'lenmez
+    cache.pop(symbol, None)
+    cache[symbol] = (fetched_at, analysis)
+
+def _tv_cache_evict(now: float):
+    """Süresi dolan kayıtları baştan at - sadece dolanlar kadar adım"""
+    for tf, cache in TV_CACHE.items():
+        ttl = TV_CACHE_TTL[tf]
+        while cache:
+            fetched_at, _ = next(iter(cache.values()))
+            if now - fetched_at < ttl:
+                break
+            cache.popitem(last=False)
+
+def tv_cached_rec(symbol: str, tf: str) -> int:
+    """Cache'teki analizin öneri kodu (REC_CODES) - yoksa 0"""
+    cached = _tv_cache_get(symbol, tf)
+    if not cached or not cached[1]:
+        return 0
+    return REC_CODES.get(cached[1].summary.get('RECOMMENDATION'), 0)
+
+def _tv_exchanges(symbol: str) -> tuple:
+    """Denenecek exchange sırası - daha önce bulunduğu exchange başta"""
+    known = TV_EXCHANGE_OF.get(symbol)
+    if known is None:
+        return TV_EXCHANGES
+    return (known,) + tuple(e for e in TV_EXCHANGES if e != known)
+
+def prefetch_tv(symbols, *tfs: str) -> bool:
+    """Coinleri tur başına tek scanner isteğiyle çek - TV_CACHE'i doldurur
+    
+    Her coin ilk turda bilinen exchange'inden istenir (tek istekte karışık
+    exchange olabilir); analizi gelmeyen timeframe'ler sonraki turda sıradaki
+    exchange'e düşer, gelenler hemen cache'lenir.
+    İlk tur istek hata verirse False döner - çağıran coin coin get_tv'ye düşmemeli.
+    """
+    # Coin başına henüz cache'te olmayan timeframe'ler
+    pending = {s: [tf for tf in tfs if _tv_cache_get(s, tf) is None] for s in symbols}
+    pending = {s: missing for s, missing in pending.items() if missing}
+    found = set()
+    
+    for attempt in range(len(TV_EXCHANGES)):
+        if not pending:
+            return True
+        
+        round_tfs = tuple(tf for tf in tfs if any(tf in missing for missing in pending.values()))
+        tickers = {f"{_tv_exchanges(s)[attempt]}:{s}USDT": s for s in pending}
+        try:
+            rows = tv_post(list(tickers), *round_tfs)
+        except TV_ERRORS as e:
+            logger.error(f"TradingView batch error (try {attempt + 1} {'/'.join(round_tfs)}): {str(e)[:50]}")
+            # Fallback turu hatası: kalanlar cache'lenmez, sonraki taramada tekrar denenir
+            return attempt > 0
+        results = tv_parse(rows, *round_tfs)
+        
+        fetched_at = time.time()
+        still_pending = {}
+        for ticker, symbol in tickers.items():
+            by_tf = results.get(ticker, {})
+            missing = []
+            for tf in pending[symbol]:
+                # calculate() null Recommend kolonlarında None döner - sadece o
+                # timeframe sıradaki exchange'e düşer, diğerleri cache'lenir
+                analysis = by_tf.get(tf)
+                if analysis:
+                    _tv_cache_put(symbol, tf, analysis, fetched_at)
+                    if symbol not in found:
+                        found.add(symbol)
+                        TV_EXCHANGE_OF[symbol] = ticker.split(':')[0]
+                else:
+                    missing.append(tf)
+            if missing:
+                still_pending[symbol] = missing
+        pending = still_pending
+    
+    # Hiçbir exchange'de yok (timeframe bazında)
+    fetched_at = time.time()
+    for symbol, missing in pending.items():
+        for tf in missing:
+            _tv_cache_put(symbol, tf, None, fetched_at)
+    return True
+
 def get_tv(symbol: str, tf=Interval.INTERVAL_5_MINUTES):
-    """TradingView'dan veri çek - multi exchange fallback"""
-    for exchange in ["BINANCE", "BYBIT", "OKX", "KUCOIN"]:
+    """TradingView'dan veri çek - cache + multi exchange fallback"""
+    cached = _tv_cache_get(symbol, tf)
+    if cached is not None:
+        return cached[1]
+    
+    failed = False
+    for exchange in _tv_exchanges(symbol):
+        ticker = f"{exchange}:{symbol}USDT"
         try:
-            handler = TA_Handler(
-                symbol=f"{symbol}USDT",
-                screener="crypto",
-                exchange=exchange,
-                interval=tf
-            )
-            return handler.get_analysis()
-        except:
+            rows = tv_post([ticker], tf)
+        except TV_ERRORS:
+            failed = True
             continue
+        analysis = tv_parse(rows, tf).get(ticker, {}).get(tf)
+        if analysis:
+            TV_EXCHANGE_OF[symbol] = exchange
+            _tv_cache_put(symbol, tf, analysis, time.time())
+            return analysis
+    
+    # Hiçbir exchange'de yok - TTL boyunca fallback zinciri tekrar denenmez.
+    # İsteklerden biri hata verdiyse "yok" kesin değil, cache'lenmez
+    if not failed:
+        _tv_cache_put(symbol, tf, None, time.time())
     return None
 
 def update_btc_trend():
     """BTC trend ve RSI güncelle - Multi-TF analiz"""
-    global BTC_RSI, BTC_TREND
+    global BTC_RSI, BTC_TREND, BTC_BIAS
     
     try:
+        # Üç timeframe tek istekte; get_tv'ler cache'den okur
+        # TradingView'a ulaşılamıyorsa önceki BTC değerleri korunur
+        if not prefetch_tv(("BTC",), Interval.INTERVAL_5_MINUTES, Interval.INTERVAL_15_MINUTES, Interval.INTERVAL_1_HOUR):
+            return BTC_RSI, BTC_TREND
         btc_5m = get_tv("BTC", Interval.INTERVAL_5_MINUTES)
         btc_15m = get_tv("BTC", Interval.INTERVAL_15_MINUTES)
         btc_1h = get_tv("BTC", Interval.INTERVAL_1_HOUR)
@@ -332,15 +623,17 @@ def update_btc_trend():
             rec_15m = btc_15m.summary.get('RECOMMENDATION', 'NEUTRAL') if btc_15m else 'NEUTRAL'
             rec_1h = btc_1h.summary.get('RECOMMENDATION', 'NEUTRAL') if btc_1h else 'NEUTRAL'
             
-            bull_count = sum(1 for r in [rec_5m, rec_15m, rec_1h] if 'BUY' in r)
-            bear_count = sum(1 for r in [rec_5m, rec_15m, rec_1h] if 'SELL' in r)
+            codes = [REC_CODES.get(r, 0) for r in (rec_5m, rec_15m, rec_1h)]
+            bull_count = sum(1 for c in codes if c > 0)
+            bear_count = sum(1 for c in codes if c < 0)
             
             if bull_count >= 2:
-                BTC_TREND = "BULLISH"
+                BTC_BIAS = 1
             elif bear_count >= 2:
-                BTC_TREND = "BEARISH"
+                BTC_BIAS = -1
             else:
-                BTC_TREND = "NEUTRAL"
+                BTC_BIAS = 0
+            BTC_TREND = TREND_NAMES[BTC_BIAS]
                 
             logger.info(f"📊 BTC Update: RSI={BTC_RSI:.0f}, Trend={BTC_TREND}")
                 
@@ -371,10 +664,7 @@ def get_market_session() -> str:
 
 def get_coin_category(symbol: str) -> Optional[str]:
     """Coin kategorisini bul"""
-    for category, coins in COIN_CATEGORIES.items():
-        if symbol in coins:
-            return category
-    return None
+    return COIN_CATEGORY.get(symbol)
 
 def check_category_limit(symbol: str) -> bool:
     """Aynı kategoride çok fazla sinyal var mı?"""
@@ -427,54 +717,52 @@ def scalp_analyze(symbol: str) -> Optional[Dict]:
         return None
     
     # ═══════ DATA FETCH ═══════
+    # 1m/5m/15m run_scan'de toplu çekildi, get_tv burada cache'den okur
+    # (cache'te yoksa coin başına istek atar); hizalama tutmayan coin için
+    # sonraki timeframe'e hiç bakılmaz
     
     tf_1m = get_tv(symbol, Interval.INTERVAL_1_MINUTE)
-    tf_5m = get_tv(symbol, Interval.INTERVAL_5_MINUTES)
-    tf_15m = get_tv(symbol, Interval.INTERVAL_15_MINUTES)
+    if not tf_1m:
+        return None
+    
+    rec_1m = tf_1m.summary.get('RECOMMENDATION', 'NEUTRAL')
+    r1m = REC_CODES.get(rec_1m, 0)
+    if r1m == 0:
+        return None  # TF alignment imkansız
     
-    if not tf_1m or not tf_5m:
+    tf_5m = get_tv(symbol, Interval.INTERVAL_5_MINUTES)
+    if not tf_5m:
         return None
     
+    rec_5m = tf_5m.summary.get('RECOMMENDATION', 'NEUTRAL')
+    r5m = REC_CODES.get(rec_5m, 0)
+    if r1m * r5m <= 0:
+        return None  # TF alignment required
+    
     # ═══════ EXTRACT INDICATORS ═══════
     
     ind = tf_5m.indicators
-    ind_1m = tf_1m.indicators
-    
-    close = ind.get('close', 0)
-    high = ind.get('high', 0)
-    low = ind.get('low', 0)
-    open_price = ind.get('open', 0)
+    (
+        close, high, low, open_price,
+        rsi, macd, macd_sig, stoch_k, stoch_d,
+        ema_9, ema_21, mom, ao, adx
+    ) = get_indicator_values(ind)
+    atr = ind.get('ATR', 0)
+    rsi_1m = tf_1m.indicators.get('RSI', 50)
     
     if not close:
         return None
     
-    # Recommendations
-    rec_1m = tf_1m.summary.get('RECOMMENDATION', 'NEUTRAL')
-    rec_5m = tf_5m.summary.get('RECOMMENDATION', 'NEUTRAL')
-    rec_15m = tf_15m.summary.get('RECOMMENDATION', 'NEUTRAL') if tf_15m else 'NEUTRAL'
-    
+    # Vote counts
     buy_1m = tf_1m.summary.get('BUY', 0)
     sell_1m = tf_1m.summary.get('SELL', 0)
     buy_5m = tf_5m.summary.get('BUY', 0)
     sell_5m = tf_5m.summary.get('SELL', 0)
     
-    # Indicators
-    rsi = ind.get('RSI', 50)
-    rsi_1m = ind_1m.get('RSI', 50)
-    macd = ind.get('MACD.macd', 0)
-    macd_sig = ind.get('MACD.signal', 0)
-    stoch_k = ind.get('Stoch.K', 50)
-    stoch_d = ind.get('Stoch.D', 50)
-    ema_9 = ind.get('EMA9', ind.get('EMA10', 0))
-    ema_21 = ind.get('EMA21', ind.get('EMA20', 0))
-    atr = ind.get('ATR', 0)
-    mom = ind.get('Mom', 0)
-    ao = ind.get('AO', 0)
-    adx = ind.get('ADX', 20)
-    volume = ind.get('volume', 0)
-    
     # ═══════ SCORING SYSTEM ═══════
     
+    # Onaylar (şablon, değerler...) olarak toplanır - string'e sadece
+    # sinyal üreten coin için, en sonda çevrilir
     signals = []
     bull = 0
     bear = 0
@@ -486,18 +774,18 @@ def scalp_analyze(symbol: str) -> Optional[Dict]:
         if 40 <= rsi <= 60:
             if rsi_mom > 2:
                 bull += WEIGHTS["rsi_momentum"]
-                signals.append(f"RSI: {rsi:.0f} ↑")
+                signals.append(("RSI: {:.0f} ↑", rsi))
             elif rsi_mom < -2:
                 bear += WEIGHTS["rsi_momentum"]
-                signals.append(f"RSI: {rsi:.0f} ↓")
+                signals.append(("RSI: {:.0f} ↓", rsi))
         elif rsi > 70 or rsi < 30:
             return None  # Overbought/Oversold skip
         elif 60 < rsi <= 70 and rsi_mom > 0:
             bull += 10
-            signals.append(f"RSI: {rsi:.0f} (high)")
+            signals.append(("RSI: {:.0f} (high)", rsi))
         elif 30 <= rsi < 40 and rsi_mom < 0:
             bear += 10
-            signals.append(f"RSI: {rsi:.0f} (low)")
+            signals.append(("RSI: {:.0f} (low)", rsi))
     
     # 2. MACD FRESH CROSS (improved detection)
     if macd is not None and macd_sig is not None:
@@ -506,10 +794,10 @@ def scalp_analyze(symbol: str) -> Optional[Dict]:
         
         if 0 < macd_hist < macd_strength:
             bull += WEIGHTS["macd_cross"]
-            signals.append("MACD: Fresh ↑")
+            signals.append(("MACD: Fresh ↑",))
         elif -macd_strength < macd_hist < 0:
             bear += WEIGHTS["macd_cross"]
-            signals.append("MACD: Fresh ↓")
+            signals.append(("MACD: Fresh ↓",))
         elif macd_hist > macd_strength:
             bull += 5  # Already bullish, less weight
         elif macd_hist < -macd_strength:
@@ -520,12 +808,13 @@ def scalp_analyze(symbol: str) -> Optional[Dict]:
         if stoch_k > 80 or stoch_k < 20:
             return None  # Extreme zones skip
         
-        if stoch_k > stoch_d and 30 < stoch_k < 70:
-            bull += WEIGHTS["stochastic"]
-            signals.append(f"Stoch: {stoch_k:.0f}>{stoch_d:.0f}")
-        elif stoch_k < stoch_d and 30 < stoch_k < 70:
-            bear += WEIGHTS["stochastic"]
-            signals.append(f"Stoch: {stoch_k:.0f}<{stoch_d:.0f}")
+        if 30 < stoch_k < 70:
+            if stoch_k > stoch_d:
+                bull += WEIGHTS["stochastic"]
+                signals.append(("Stoch: {:.0f}>{:.0f}", stoch_k, stoch_d))
+            elif stoch_k < stoch_d:
+                bear += WEIGHTS["stochastic"]
+                signals.append(("Stoch: {:.0f}<{:.0f}", stoch_k, stoch_d))
     
     # 4. EMA9/21 CROSS (improved)
     if ema_9 and ema_21 and close:
@@ -533,10 +822,10 @@ def scalp_analyze(symbol: str) -> Optional[Dict]:
         
         if 0 < ema_diff < 0.2:
             bull += WEIGHTS["ema_cross"]
-            signals.append("EMA9>21 ✓")
+            signals.append(("EMA9>21 ✓",))
         elif -0.2 < ema_diff < 0:
             bear += WEIGHTS["ema_cross"]
-            signals.append("EMA9<21 ✓")
+            signals.append(("EMA9<21 ✓",))
         elif ema_diff > 0.5:
             bull += 5
         elif ema_diff < -0.5:
@@ -546,52 +835,60 @@ def scalp_analyze(symbol: str) -> Optional[Dict]:
     if mom and ao:
         if mom > 0 and ao > 0:
             bull += WEIGHTS["momentum"]
-            signals.append("Mom: +")
+            signals.append(("Mom: +",))
         elif mom < 0 and ao < 0:
             bear += WEIGHTS["momentum"]
-            signals.append("Mom: -")
+            signals.append(("Mom: -",))
     
-    # 6. TIMEFRAME ALIGNMENT (critical)
-    if rec_1m in ['STRONG_BUY', 'BUY'] and rec_5m in ['STRONG_BUY', 'BUY']:
+    # 6. TIMEFRAME ALIGNMENT (critical - fetch sırasında doğrulandı)
+    if r1m > 0:
         if bull > bear:
             bull += WEIGHTS["tf_alignment"]
-            signals.append(f"1m+5m: ↑ ({buy_1m+buy_5m})")
-    elif rec_1m in ['STRONG_SELL', 'SELL'] and rec_5m in ['STRONG_SELL', 'SELL']:
-        if bear > bull:
-            bear += WEIGHTS["tf_alignment"]
-            signals.append(f"1m+5m: ↓ ({sell_1m+sell_5m})")
-    else:
-        return None  # TF alignment required
+            signals.append(("1m+5m: ↑ ({})", buy_1m + buy_5m))
+    elif bear > bull:
+        bear += WEIGHTS["tf_alignment"]
+        signals.append(("1m+5m: ↓ ({})", sell_1m + sell_5m))
     
     # 7. 15M BONUS (flexible)
+    # Kalan bonusların hepsiyle bile MIN_SCORE'a ulaşamıyorsa erken çıkılır
+    # (15m zaten toplu çekildi - kazanç sadece cache okuması ve kalan adımlar)
     prelim_score = max(bull, bear)
+    if prelim_score + LATE_BONUS_MAX < MIN_SCORE:
+        return None
     
-    if rec_15m in ['STRONG_BUY', 'BUY'] and bull > bear:
+    tf_15m = get_tv(symbol, Interval.INTERVAL_15_MINUTES)
+    rec_15m = tf_15m.summary.get('RECOMMENDATION', 'NEUTRAL') if tf_15m else 'NEUTRAL'
+    r15m = REC_CODES.get(rec_15m, 0)
+    
+    # 15m ve ADX bonusu sadece öndeki tarafa eklenir - sıralama bu iki adımda değişmez
+    bull_lead = bull > bear
+    
+    if r15m > 0 and bull_lead:
         bull += WEIGHTS["tf_15m_bonus"]
-        signals.append("15m: ↑")
-    elif rec_15m in ['STRONG_SELL', 'SELL'] and bear > bull:
+        signals.append(("15m: ↑",))
+    elif r15m < 0 and bear > bull:
         bear += WEIGHTS["tf_15m_bonus"]
-        signals.append("15m: ↓")
+        signals.append(("15m: ↓",))
     elif prelim_score >= 85:
-        signals.append("15m: Bypass")
+        signals.append(("15m: Bypass",))
     else:
         return None
     
     # 8. ADX BONUS (trend strength) - NEW
     if adx and adx > 25:
-        if bull > bear:
+        if bull_lead:
             bull += WEIGHTS["adx_bonus"]
         else:
             bear += WEIGHTS["adx_bonus"]
-        signals.append(f"ADX: {adx:.0f}")
+        signals.append(("ADX: {:.0f}", adx))
     
     # 9. BTC ALIGNMENT BONUS - NEW
-    if bull > bear and BTC_TREND == "BULLISH":
+    if bull > bear and BTC_BIAS > 0:
         bull += WEIGHTS["btc_alignment"]
-        signals.append("BTC: ↑")
-    elif bear > bull and BTC_TREND == "BEARISH":
+        signals.append(("BTC: ↑",))
+    elif bear > bull and BTC_BIAS < 0:
         bear += WEIGHTS["btc_alignment"]
-        signals.append("BTC: ↓")
+        signals.append(("BTC: ↓",))
     
     # ═══════ DIRECTION & SCORE ═══════
     
@@ -606,21 +903,15 @@ def scalp_analyze(symbol: str) -> Optional[Dict]:
     
     # ═══════ FILTERS ═══════
     
-    # BTC RSI Filter (basic)
-    if direction == "LONG" and BTC_RSI < 45:
-        return None
-    if direction == "SHORT" and BTC_RSI > 55:
-        return None
-    
-    # BTC TREND Filter (strict) - NEW!
+    # BTC RSI Filter (basic) + BTC TREND Filter (strict)
     # LONG sinyali için BTC BEARISH olmamalı (yüksek skorlu hariç)
     # SHORT sinyali için BTC BULLISH olmamalı
-    if direction == "LONG" and BTC_TREND == "BEARISH":
-        if score < 90:  # Sadece 90+ skorlu sinyaller bypass edebilir
-            return None
-    if direction == "SHORT" and BTC_TREND == "BULLISH":
-        if score < 90:
+    # Sadece 90+ skorlu sinyaller trend filtresini bypass edebilir
+    if direction == "LONG":
+        if BTC_RSI < 45 or (BTC_BIAS < 0 and score < 90):
             return None
+    elif BTC_RSI > 55 or (BTC_BIAS > 0 and score < 90):
+        return None
     
     # Improved Fake Breakout Filter
     if high and low and close and open_price:
@@ -646,53 +937,35 @@ def scalp_analyze(symbol: str) -> Optional[Dict]:
     
     # ═══════ CALCULATE LEVELS ═══════
     
+    # Entry'den uzaklıklar (SL, TP1, TP2, TP3)
     if atr and atr > 0:
-        if direction == "LONG":
-            entry = close
-            sl = close - (atr * ATR_SL)
-            tp1 = close + (atr * ATR_TP1)
-            tp2 = close + (atr * ATR_TP2)
-            tp3 = close + (atr * ATR_TP3)
-        else:
-            entry = close
-            sl = close + (atr * ATR_SL)
-            tp1 = close - (atr * ATR_TP1)
-            tp2 = close - (atr * ATR_TP2)
-            tp3 = close - (atr * ATR_TP3)
+        sl_off, tp1_off, tp2_off, tp3_off = (atr * m for m in ATR_LEVELS)
     else:
-        if direction == "LONG":
-            entry = close
-            sl = close * (1 - PCT_SL / 100)
-            tp1 = close * (1 + PCT_TP1 / 100)
-            tp2 = close * (1 + PCT_TP2 / 100)
-            tp3 = close * (1 + PCT_TP3 / 100)
-        else:
-            entry = close
-            sl = close * (1 + PCT_SL / 100)
-            tp1 = close * (1 - PCT_TP1 / 100)
-            tp2 = close * (1 - PCT_TP2 / 100)
-            tp3 = close * (1 - PCT_TP3 / 100)
+        sl_off, tp1_off, tp2_off, tp3_off = (close * f for f in PCT_LEVELS)
+    
+    # LONG: SL altta, TP'ler üstte - SHORT için işaret döner
+    side = 1 if direction == "LONG" else -1
+    entry = close
+    sl = close - side * sl_off
+    tp1 = close + side * tp1_off
+    tp2 = close + side * tp2_off
+    tp3 = close + side * tp3_off
     
     # Calculate percentages
-    sl_pct = abs(entry - sl) / entry * 100
-    tp1_pct = abs(tp1 - entry) / entry * 100
-    tp2_pct = abs(tp2 - entry) / entry * 100
-    tp3_pct = abs(tp3 - entry) / entry * 100
+    sl_pct = sl_off / entry * 100
+    tp1_pct = tp1_off / entry * 100
+    tp2_pct = tp2_off / entry * 100
+    tp3_pct = tp3_off / entry * 100
     
     # Risk/Reward
-    risk = abs(entry - sl)
-    rr1 = abs(tp1 - entry) / risk if risk > 0 else 1
-    rr2 = abs(tp2 - entry) / risk if risk > 0 else 1
-    rr3 = abs(tp3 - entry) / risk if risk > 0 else 1
-    
-    # ═══════ RECORD & RETURN ═══════
+    rr1 = tp1_off / sl_off if sl_off > 0 else 1
+    rr2 = tp2_off / sl_off if sl_off > 0 else 1
+    rr3 = tp3_off / sl_off if sl_off > 0 else 1
     
-    RECENT_SIGNALS[symbol] = {'dir': direction, 'time': now}
+    # ═══════ RETURN ═══════
+    # RECENT_SIGNALS / kategori sayacı run_scan'de güncellenir
     
-    # Update category count
     category = get_coin_category(symbol)
-    if category:
-        ACTIVE_CATEGORY_COUNT[category] = ACTIVE_CATEGORY_COUNT.get(category, 0) + 1
     
     return {
         'symbol': f"{symbol}/USDT",
@@ -721,21 +994,37 @@ def scalp_analyze(symbol: str) -> Optional[Dict]:
         'rec_5m': rec_5m,
         'rec_15m': rec_15m,
         'session': get_market_session(),
-        'signals': signals,
+        'signals': [fmt.format(*args) for fmt, *args in signals],
         'category': category,
-        'timestamp': datetime.utcnow().isoformat()
+        'timestamp': int(now)  # Unix epoch (s)
     }
 
 # ═══════════════════════════════════════════════════════════════
 # SCANNER
 # ═══════════════════════════════════════════════════════════════
 
+def _safe_analyze(coin: str) -> Optional[Dict]:
+    """scalp_analyze - hata durumunda None (thread pool için)"""
+    try:
+        return scalp_analyze(coin)
+    except Exception as e:
+        logger.error(f"Error {coin}: {str(e)[:30]}")
+        return None
+
 def run_scan() -> List[Dict]:
+    """Tarama - aynı anda tek scan çalışır"""
+    with SCAN_LOCK:
+        return _run_scan()
+
+def _run_scan() -> List[Dict]:
     """Tüm coinleri tara"""
     global RECENT_SIGNALS, SIGNALS_TODAY, ACTIVE_CATEGORY_COUNT
     
     now = time.time()
     
+    # Clean expired TradingView cache
+    _tv_cache_evict(now)
+    
     # Update BTC trend
     update_btc_trend()
     
@@ -756,24 +1045,59 @@ def run_scan() -> List[Dict]:
         logger.info(f"⚠️ Dangerous hour (UTC {current_hour}), skipping...")
         return []
     
-    logger.info(f"⚡ Scanning {len(COINS)} coins | BTC: {BTC_RSI:.0f} ({BTC_TREND}) | Today: {SIGNALS_TODAY}/{MAX_SIGNALS_DAY}")
+    # Daily limit check - her coin zaten reddedilecek, taramaya gerek yok
+    if SIGNALS_TODAY >= MAX_SIGNALS_DAY:
+        logger.info(f"🛑 Daily limit reached ({SIGNALS_TODAY}/{MAX_SIGNALS_DAY}), skipping...")
+        return []
     
-    signals = []
+    # Cooldown'daki (RECENT_SIGNALS az önce temizlendi) ve kategorisi dolu
+    # coinler zaten reddedilecek - ne çekilir ne analiz edilir
+    coins = tuple(
+        coin for coin in COINS
+        if coin not in RECENT_SIGNALS and check_category_limit(coin)
+    )
     
-    for coin in COINS:
-        try:
-            result = scalp_analyze(coin)
-            if result:
-                signals.append(result)
-                logger.info(f"✅ {coin} {result['direction']} Score:{result['score']}")
-            time.sleep(0.15)  # Rate limiting
-        except Exception as e:
-            logger.error(f"Error {coin}: {str(e)[:30]}")
+    logger.info(f"⚡ Scanning {len(coins)}/{len(COINS)} coins | BTC: {BTC_RSI:.0f} ({BTC_TREND}) | Today: {SIGNALS_TODAY}/{MAX_SIGNALS_DAY}")
+    
+    # İlk kapı (1m) tüm coinler için toplu çekilir - coin başına istek yerine
+    # exchange başına tek istek; scalp_analyze bunları cache'den okur
+    # Toplu istek hata verdiyse TradingView'a ulaşılamıyor: coin başına
+    # fallback istekleri SCAN_LOCK'u dakikalarca tutar, bu scan atlanır
+    if not prefetch_tv(coins, Interval.INTERVAL_1_MINUTE):
+        logger.warning("⚠️ TradingView unreachable, skipping scan")
+        return []
+    
+    # 5m ve 15m sadece 1m'de yön veren coinler için, aynı istekte toplu çekilir;
+    # 1m NEUTRAL olanlar scalp_analyze'da 5m'e hiç bakmadan elenir
+    if not prefetch_tv(
+        [coin for coin in coins if tv_cached_rec(coin, Interval.INTERVAL_1_MINUTE)],
+        Interval.INTERVAL_5_MINUTES, Interval.INTERVAL_15_MINUTES
+    ):
+        logger.warning("⚠️ TradingView unreachable, skipping scan")
+        return []
+    
+    # Coinler paralel analiz edilir (süre HTTP beklemesinde, GIL serbest)
+    results = SCAN_POOL.map(_safe_analyze, coins)
+    candidates = [(coin, result) for coin, result in zip(coins, results) if result]
     
     # Sort by score
-    signals = sorted(signals, key=lambda x: x['score'], reverse=True)
+    candidates.sort(key=lambda x: x[1]['score'], reverse=True)
     
-    # Limit signals per scan
+    # Record - tek thread'de, skor sırasına göre kategori limiti uygulanır
+    signals = []
+    for coin, result in candidates:
+        if not check_category_limit(coin):
+            continue
+        
+        RECENT_SIGNALS[coin] = {'dir': result['direction'], 'time': now}
+        category = result['category']
+        if category:
+            ACTIVE_CATEGORY_COUNT[category] = ACTIVE_CATEGORY_COUNT.get(category, 0) + 1
+        
+        signals.append(result)
+        logger.info(f"✅ {coin} {result['direction']} Score:{result['score']}")
+    
+    # Limit signals per scan - skor sırasında, çağıranlar tekrar kesmez
     signals = signals[:MAX_SIGNALS_PER_SCAN]
     
     logger.info(f"Found {len(signals)} signals")
@@ -784,63 +1108,29 @@ def run_scan() -> List[Dict]:
 # MESSAGE FORMATTERS
 # ═══════════════════════════════════════════════════════════════
 
-def format_price(price: float) -> str:
-    """Akıllı fiyat formatlama - düşük fiyatlı coinler için daha fazla decimal"""
-    if price == 0:
-        return "$0.00"
-    elif price < 0.0001:
-        return f"${price:.8f}"
-    elif price < 0.01:
-        return f"${price:.6f}"
-    elif price < 1:
-        return f"${price:.5f}"
-    elif price < 100:
-        return f"${price:.4f}"
-    else:
-        return f"${price:.2f}"
+DIRECTION_EMOJI = {"LONG": "🟢", "SHORT": "🔴"}
+CATEGORY_EMOJI = {"meme": "🐕", "ai": "🤖", "defi": "🏦"}
+SCORE_BARS = tuple("█" * i + "░" * (10 - i) for i in range(11))
 
-def format_signal(s: Dict, signal_id: int = None) -> str:
-    """Sinyal mesajını formatla - improved"""
-    emoji = "🟢" if s['direction'] == "LONG" else "🔴"
-    lev = f"{MAX_LEVERAGE_HIGH}x" if s['score'] >= 85 else f"{MAX_LEVERAGE_NORMAL}x"
-    
-    # Score bar
-    score_filled = int(s['score'] / 10)
-    score_bar = "█" * score_filled + "░" * (10 - score_filled)
-    
-    # Category emoji
-    cat_emoji = ""
-    if s.get('category') == "meme":
-        cat_emoji = "🐕"
-    elif s.get('category') == "ai":
-        cat_emoji = "🤖"
-    elif s.get('category') == "defi":
-        cat_emoji = "🏦"
-    
-    msg = f"""{emoji} **{s['symbol']}** | {s['direction']} {cat_emoji}
+SIGNAL_TEMPLATE = """{emoji} **{symbol}** | {direction} {cat_emoji}
 ━━━━━━━━━━━━━━━━━━━━
 
-⚡ **SCORE:** [{score_bar}] **{s['score']}/100**
-🎚️ Leverage: **{lev}** | {s.get('session', '')}
+⚡ **SCORE:** [{score_bar}] **{score}/100**
+🎚️ Leverage: **{lev}** | {session}
 
 📊 **MARKET:**
-• BTC RSI: {s['btc_rsi']:.0f} ({s.get('btc_trend', 'N/A')})
-• 1m: {s['rec_1m']} | 5m: {s['rec_5m']} | 15m: {s['rec_15m']}
+• BTC RSI: {btc_rsi:.0f} ({btc_trend})
+• 1m: {rec_1m} | 5m: {rec_5m} | 15m: {rec_15m}
 
 💰 **LEVELS (ATR):**
-┌ Entry: `{format_price(s['entry'])}`
-├ SL: `{format_price(s['sl'])}` (-{s['sl_pct']:.2f}%)
-├ TP1: `{format_price(s['tp1'])}` (+{s['tp1_pct']:.2f}%) [{s['rr1']:.1f}R]
-├ TP2: `{format_price(s['tp2'])}` (+{s['tp2_pct']:.2f}%) [{s['rr2']:.1f}R]
-└ TP3: `{format_price(s['tp3'])}` (+{s['tp3_pct']:.2f}%) [{s['rr3']:.1f}R]
+┌ Entry: `{entry_str}`
+├ SL: `{sl_str}` (-{sl_pct:.2f}%)
+├ TP1: `{tp1_str}` (+{tp1_pct:.2f}%) [{rr1:.1f}R]
+├ TP2: `{tp2_str}` (+{tp2_pct:.2f}%) [{rr2:.1f}R]
+└ TP3: `{tp3_str}` (+{tp3_pct:.2f}%) [{rr3:.1f}R]
 
 📋 **CONFIRMATIONS:**
-"""
-    
-    for sig in s['signals'][:6]:
-        msg += f"✅ {sig}\n"
-    
-    msg += f"""
+{confirmations}
 🧠 **TRADE MANAGEMENT:**
 • TP1 → Close 40% ⚠️ MUTLAKA AL
 • SL → Move to BE after TP1
@@ -850,6 +1140,39 @@ def format_signal(s: Dict, signal_id: int = None) -> str:
 ⚠️ TP1 scalp hedefidir, atlama!
 ━━━━━━━━━━━━━━━━━━━━"""
 
+def format_price(price: float) -> str:
+    """Akıllı fiyat formatlama - düşük fiyatlı coinler için daha fazla decimal"""
+    if price == 0:
+        return "$0.00"
+    elif price < 0.0001:
+        return f"${price:.8f}"
+    elif price < 0.01:
+        return f"${price:.6f}"
+    elif price < 1:
+        return f"${price:.5f}"
+    elif price < 100:
+        return f"${price:.4f}"
+    else:
+        return f"${price:.2f}"
+
+def format_signal(s: Dict, signal_id: int = None) -> str:
+    """Sinyal mesajını formatla - improved"""
+    msg = SIGNAL_TEMPLATE.format_map({
+        **s,
+        'emoji': DIRECTION_EMOJI[s['direction']],
+        'cat_emoji': CATEGORY_EMOJI.get(s.get('category'), ""),
+        'score_bar': SCORE_BARS[min(int(s['score'] / 10), 10)],
+        'lev': f"{MAX_LEVERAGE_HIGH}x" if s['score'] >= 85 else f"{MAX_LEVERAGE_NORMAL}x",
+        'session': s.get('session', ''),
+        'btc_trend': s.get('btc_trend', 'N/A'),
+        'entry_str': format_price(s['entry']),
+        'sl_str': format_price(s['sl']),
+        'tp1_str': format_price(s['tp1']),
+        'tp2_str': format_price(s['tp2']),
+        'tp3_str': format_price(s['tp3']),
+        'confirmations': "".join(f"✅ {sig}\n" for sig in s['signals'][:6]),
+    })
+
     if signal_id:
         msg += f"\n📝 ID: `{signal_id}`"
     
@@ -969,12 +1292,9 @@ async def start_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def scan_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Manuel tarama"""
-    global SIGNALS_TODAY
-    
     await update.message.reply_text("⚡ Scanning...")
     
-    loop = asyncio.get_event_loop()
-    signals = await loop.run_in_executor(None, run_scan)
+    signals = await asyncio.to_thread(run_scan)
     
     if signals:
         # Summary
@@ -986,16 +1306,9 @@ async def scan_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(summary, parse_mode='Markdown')
         
         # Detailed signals
-        for sig in signals[:3]:
-            signal_id = save_signal_to_db(sig)
-            SIGNALS_TODAY += 1
-            
-            await update.message.reply_text(
-                format_signal(sig, signal_id),
-                reply_markup=build_signal_keyboard(sig, signal_id),
-                parse_mode='Markdown'
-            )
-            await asyncio.sleep(0.5)
+        await asyncio.gather(*(
+            send_signal(context.bot, update.effective_chat.id, sig) for sig in signals[:3]
+        ))
     else:
         if is_dangerous_hour():
             hour = datetime.utcnow().hour
@@ -1016,7 +1329,7 @@ async def history_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Son sinyaller"""
     limit = 10
     if context.args and context.args[0].isdigit():
-        limit = int(context.args[0])
+        limit = min(int(context.args[0]), HISTORY_MAX)
     
     signals = get_recent_signals(limit)
     
@@ -1047,19 +1360,12 @@ async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     if data == "scan":
         await query.message.reply_text("⚡ Starting scan...")
-        loop = asyncio.get_event_loop()
-        signals = await loop.run_in_executor(None, run_scan)
+        signals = await asyncio.to_thread(run_scan)
         
         if signals:
-            for sig in signals[:2]:
-                signal_id = save_signal_to_db(sig)
-                global SIGNALS_TODAY
-                SIGNALS_TODAY += 1
-                await query.message.reply_text(
-                    format_signal(sig, signal_id),
-                    reply_markup=build_signal_keyboard(sig, signal_id),
-                    parse_mode='Markdown'
-                )
+            await asyncio.gather(*(
+                send_signal(context.bot, query.message.chat_id, sig) for sig in signals[:2]
+            ))
         else:
             await query.message.reply_text("❌ No signals found")
     
@@ -1102,10 +1408,30 @@ async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 # BACKGROUND SCANNER
 # ═══════════════════════════════════════════════════════════════
 
-async def background_scanner(app):
-    """Arka planda sürekli tarama"""
+async def send_signal(bot, chat_id: int, sig: Dict):
+    """Sinyali kaydet ve chat'e gönder"""
     global SIGNALS_TODAY
     
+    signal_id = save_signal_to_db(sig)
+    SIGNALS_TODAY += 1
+    
+    text = format_signal(sig, signal_id)
+    keyboard = build_signal_keyboard(sig, signal_id)
+    
+    await TELEGRAM_LIMITER.wait()
+    try:
+        await bot.send_message(chat_id=chat_id, text=text, reply_markup=keyboard, parse_mode='Markdown')
+    except RetryAfter as e:
+        # Flood limit - Telegram'ın verdiği süre kadar bekle, bir kez daha dene
+        delay = e.retry_after
+        if isinstance(delay, timedelta):
+            delay = delay.total_seconds()
+        logger.warning(f"Telegram flood limit, retry in {delay}s")
+        await asyncio.sleep(delay)
+        await bot.send_message(chat_id=chat_id, text=text, reply_markup=keyboard, parse_mode='Markdown')
+
+async def background_scanner(app):
+    """Arka planda sürekli tarama"""
     logger.info("⚡ Background scanner starting...")
     await asyncio.sleep(5)
     
@@ -1137,21 +1463,12 @@ async def background_scanner(app):
     
     while True:
         try:
-            loop = asyncio.get_event_loop()
-            signals = await loop.run_in_executor(None, run_scan)
+            signals = await asyncio.to_thread(run_scan)
             
             if signals and ADMIN_CHAT_ID:
-                for sig in signals[:MAX_SIGNALS_PER_SCAN]:
-                    signal_id = save_signal_to_db(sig)
-                    SIGNALS_TODAY += 1
-                    
-                    await app.bot.send_message(
-                        chat_id=int(ADMIN_CHAT_ID),
-                        text=format_signal(sig, signal_id),
-                        reply_markup=build_signal_keyboard(sig, signal_id),
-                        parse_mode='Markdown'
-                    )
-                    await asyncio.sleep(1)
+                await asyncio.gather(*(
+                    send_signal(app.bot, int(ADMIN_CHAT_ID), sig) for sig in signals
+                ))
             
             await asyncio.sleep(SCAN_INTERVAL)
             